@@ -1,10 +1,11 @@
 """Configuration settings for the AI Product Intelligence microservice."""
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -23,12 +24,17 @@ class Settings(BaseSettings):
     
     # Model Configuration
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_precision: str = "auto"  # auto, fp32, fp16 or bf16 weights for the embedding model
+    embedding_backend: str = "torch"  # torch or onnx (export with tools/export_onnx.py)
+    compile_embedding_model: bool = False  # torch.compile the model (slower startup, faster queries)
+    onnx_model_file: str = "onnx/model_qint8_avx512_vnni.onnx"  # relative to onnx_model_dir
     
     # Paths
     base_dir: Path = Path(__file__).parent.parent
     data_dir: Path = base_dir / "data"
     docs_dir: Path = data_dir / "docs"
     faiss_index_dir: Path = data_dir / "faiss_index"
+    onnx_model_dir: Path = data_dir / "onnx_model"
     catalog_path: Path = data_dir / "catalog.csv"
     
     # Matching Configuration
@@ -40,14 +46,58 @@ class Settings(BaseSettings):
     chunk_size: int = 300  # words - Increased from 200 for more complete context
     chunk_overlap: int = 75  # words - Increased from 50 to preserve context across chunks
     
+    # FAISS Index Configuration (HNSW graph)
+    hnsw_m: int = 32  # neighbors per node
+    hnsw_ef_construction: int = 200  # candidate list size while building
+    hnsw_ef_search: int = 64  # candidate list size per query
+    use_gpu_index: bool = True  # search exact flat indexes on GPU 0 when faiss-gpu and a GPU are available
+    
+    # CORS Configuration (explicit lists, no wildcards)
+    cors_origins: List[str] = ["http://localhost:3000"]
+    cors_methods: List[str] = ["GET", "POST"]
+    cors_headers: List[str] = ["content-type", "authorization"]
+    
+    # API Documentation
+    enable_openapi_examples: bool = True  # attach example payloads to the OpenAPI schemas
+    
+    # Startup Configuration
+    warmup_on_startup: bool = True  # run dummy OCR/match/retrieval before serving
+    
+    # Logging Configuration
+    log_requests: bool = False  # log method, path and latency for every request
+    
+    # Upload Configuration
+    max_image_bytes: int = 10 * 1024 * 1024  # reject larger uploads with 413
+    min_image_bytes: int = 256  # smaller images are not sent to OCR
+    
+    # Concurrency Configuration
+    worker_threads: Optional[int] = None  # blocking-call pool size (defaults to available CPUs)
+    app_threads: Optional[int] = None  # torch/FAISS/BLAS threads (defaults to available CPUs)
+    
+    # Embedding Batching Configuration
+    embedding_batch_size: int = 64  # chunks per forward pass when building the index
+    embedding_batch_max: int = 32  # max queries encoded together
+    embedding_batch_flush_ms: float = 8.0  # wait for concurrent queries before encoding
+    
+    # Caching Configuration
+    match_cache_size: int = 512  # normalized OCR text -> candidates
+    ocr_cache_size: int = 256  # image bytes -> OCR text
+    answer_cache_size: int = 1024  # (product, question, context) -> LLM answer
+    
     # Scoring Weights
     title_weight: float = 0.5
     model_weight: float = 0.3
     brand_weight: float = 0.2
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
 
 # Ensure directories exist
 settings.data_dir.mkdir(exist_ok=True)
@@ -1,11 +1,20 @@
 """Main FastAPI application for AI Product Intelligence microservice."""
 
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import asyncio
 import logging
 import time
 
 from app.config import settings
+from app.utils.concurrency import configure_native_threads, run_blocking, set_native_thread_env
+
+# Must precede the service imports, which load numpy, torch and faiss
+set_native_thread_env()
+
 from app.services.ocr_service import OCRService
 from app.services.matcher_service import MatcherService
 from app.services.rag_service import RAGService
@@ -20,86 +29,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create FastAPI app
-app = FastAPI(
-    title="AI Product Intelligence API",
-    description="Product recognition and Q&A using OCR and RAG",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify actual origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 
-# Add latency tracking middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Track request latency and add to response headers."""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+async def warm_up_services(
+    ocr_service: OCRService,
+    matcher_service: MatcherService,
+    rag_service: RAGService
+):
+    """
+    Exercise each service once so lazy loading happens before the first request.
     
-    # Add header for clients
-    response.headers["X-Process-Time"] = f"{process_time:.3f}"
+    Triggers Tesseract language data loading, the first rapidfuzz call, and the
+    first batched query embedding and per-product FAISS search. Failures are
+    logged, not raised.
+    """
+    logger.info("Warming up services...")
     
-    # Log for monitoring
-    logger.info(f"{request.method} {request.url.path} - {process_time:.3f}s")
+    async def warm_up_rag():
+        # Same path as /answer: batched query embedding, then a per-product search
+        product_id = next(iter(matcher_service.product_ids()), None)
+        query_embedding = await rag_service.embed_query("warmup")
+        await run_blocking(rag_service.retrieve_with_embedding, query_embedding, product_id=product_id, top_k=1)
     
-    return response
-
-
-# Global service instances
-ocr_service = None
-matcher_service = None
-rag_service = None
-llm_service = None
+    results = await asyncio.gather(
+        run_blocking(ocr_service.warmup),
+        run_blocking(matcher_service.find_matches, "warmup"),
+        warm_up_rag(),
+        return_exceptions=True
+    )
+    for name, result in zip(("OCR", "matcher", "RAG"), results):
+        if isinstance(result, Exception):
+            logger.warning("%s warmup failed: %s", name, result)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on application startup."""
-    global ocr_service, matcher_service, rag_service, llm_service
-    
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup and clean up on shutdown."""
     logger.info("Initializing AI Product Intelligence API...")
+    configure_native_threads()
     
     try:
-        # Initialize services
-        logger.info("Loading OCR service...")
-        ocr_service = OCRService()
-        
-        logger.info("Loading matcher service...")
-        matcher_service = MatcherService()
-        
-        logger.info("Loading RAG service...")
-        rag_service = RAGService()
+        # Construct services concurrently (model loading, index and catalog parsing)
+        logger.info("Loading OCR, matcher, RAG and LLM services...")
+        ocr_service, matcher_service, rag_service, llm_service = await asyncio.gather(
+            asyncio.to_thread(OCRService),
+            asyncio.to_thread(MatcherService),
+            asyncio.to_thread(RAGService),
+            asyncio.to_thread(LLMService),
+        )
         
-        logger.info("Loading LLM service...")
-        llm_service = LLMService()
-        
-        # Inject services into routers
-        recognize.set_services(ocr_service, matcher_service)
-        products.set_services(rag_service, llm_service, matcher_service)
-        combined.set_services(ocr_service, matcher_service, rag_service, llm_service)
+        # Expose services to routers via app.state
+        app.state.ocr_service = ocr_service
+        app.state.matcher_service = matcher_service
+        app.state.rag_service = rag_service
+        app.state.llm_service = llm_service
         
         logger.info("All services initialized successfully")
         
+        if settings.warmup_on_startup:
+            await warm_up_services(ocr_service, matcher_service, rag_service)
+    
     except Exception as e:
-        logger.error(f"Failed to initialize services: {e}")
+        logger.error("Failed to initialize services: %s", e)
         raise
+    
+    yield
+    
+    logger.info("Shutting down AI Product Intelligence API...")
+    await rag_service.close()
+    await llm_service.close()
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on application shutdown."""
-    logger.info("Shutting down AI Product Intelligence API...")
+class ProcessTimeMiddleware:
+    """Pure ASGI middleware that adds an X-Process-Time header (seconds)."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_ns = time.perf_counter_ns()
+        
+        async def send_with_process_time(message: Message):
+            if message["type"] == "http.response.start":
+                process_time = (time.perf_counter_ns() - start_ns) / 1e9
+                
+                # Add header for clients
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", f"{process_time:.3f}".encode()))
+                message["headers"] = headers
+                
+                # Per-request access log is opt-in (LOG_REQUESTS=true)
+                if settings.log_requests:
+                    logger.info("%s %s - %.3fs", scope["method"], scope["path"], process_time)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_process_time)
+
+
+# Create FastAPI app
+app = FastAPI(
+    title="AI Product Intelligence API",
+    description="Product recognition and Q&A using OCR and RAG",
+    version="1.0.0",
+    docs_url="/docs",
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.cors_origins,
+    allow_credentials=True,
+    allow_methods=settings.cors_methods,
+    allow_headers=settings.cors_headers,
+)
+
+
+# Add latency tracking middleware
+app.add_middleware(ProcessTimeMiddleware)
 
 
 @app.get("/", response_model=HealthResponse)
@@ -0,0 +1,40 @@
+"""Example payloads shown in the OpenAPI documentation."""
+
+PRODUCT_CANDIDATE_EXAMPLE = {
+    "product_id": "iphone-15-pro-max",
+    "title": "iPhone 15 Pro Max",
+    "score": 0.93,
+    "evidence": ["OCR: iPhone 15 Pro Max", "Brand: Apple"]
+}
+
+RECOGNITION_RESPONSE_EXAMPLE = {
+    "candidates": [
+        {
+            "product_id": "iphone-15-pro-max",
+            "title": "iPhone 15 Pro Max",
+            "score": 0.93,
+            "evidence": ["OCR: iPhone 15 Pro Max"]
+        }
+    ],
+    "best_product_id": "iphone-15-pro-max"
+}
+
+ANSWER_REQUEST_EXAMPLE = {
+    "question": "What is the battery capacity of this product?",
+    "use_external_llm": True
+}
+
+ANSWER_RESPONSE_EXAMPLE = {
+    "answer": "The iPhone 15 Pro Max has a 4422 mAh battery.",
+    "context_sources": ["iphone-15-pro-max.txt"]
+}
+
+COMBINED_RESPONSE_EXAMPLE = {
+    "recognition": RECOGNITION_RESPONSE_EXAMPLE,
+    "answer": ANSWER_RESPONSE_EXAMPLE
+}
+
+HEALTH_RESPONSE_EXAMPLE = {
+    "status": "healthy",
+    "message": "Service is running"
+}
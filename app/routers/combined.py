@@ -1,37 +1,27 @@
 """Combined endpoint for recognition and Q&A in one call."""
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
 from typing import Optional
+import asyncio
 import logging
 
+from app.config import settings
 from app.models.schemas import CombinedResponse, RecognitionResponse, AnswerResponse
-from app.services.ocr_service import OCRService
-from app.services.matcher_service import MatcherService
-from app.services.rag_service import RAGService
-from app.services.llm_service import LLMService
+from app.utils.concurrency import run_blocking
+from app.utils.uploads import read_upload_capped
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="", tags=["combined"])
 
-# Service instances (will be injected via dependency)
-ocr_service: Optional[OCRService] = None
-matcher_service: Optional[MatcherService] = None
-rag_service: Optional[RAGService] = None
-llm_service: Optional[LLMService] = None
 
-
-def set_services(ocr: OCRService, matcher: MatcherService, rag: RAGService, llm: LLMService):
-    """Set service instances for the router."""
-    global ocr_service, matcher_service, rag_service, llm_service
-    ocr_service = ocr
-    matcher_service = matcher
-    rag_service = rag
-    llm_service = llm
-
-
-@router.post("/recognize-and-answer", response_model=CombinedResponse)
+@router.post(
+    "/recognize-and-answer",
+    response_model=CombinedResponse,
+    response_model_exclude_unset=True
+)
 async def recognize_and_answer(
+    request: Request,
     image: UploadFile = File(...),
     question: Optional[str] = Form(None)
 ):
@@ -39,6 +29,7 @@ async def recognize_and_answer(
     Recognize product from image and optionally answer a question about it.
     
     Args:
+        request: Incoming request (used to reach app-scoped services)
         image: Uploaded image file
         question: Optional question about the product
         
@@ -54,22 +45,41 @@ async def recognize_and_answer(
             )
         
         # Step 1: Recognize product
-        logger.info(f"Processing combined request with image: {image.filename}")
+        logger.info("Processing combined request with image: %s", image.filename)
         
-        image_bytes = await image.read()
-        ocr_text = ocr_service.extract_text(image_bytes)
+        image_bytes = await read_upload_capped(image, settings.max_image_bytes)
+        
+        ocr_service = request.app.state.ocr_service
+        matcher_service = request.app.state.matcher_service
+        rag_service = request.app.state.rag_service
+        llm_service = request.app.state.llm_service
+        
+        # The question embedding does not depend on OCR, so overlap the two
+        query_embedding = None
+        if question:
+            ocr_text, query_embedding = await asyncio.gather(
+                run_blocking(ocr_service.extract_text, image_bytes),
+                rag_service.embed_query(question),
+                return_exceptions=True
+            )
+            if isinstance(ocr_text, Exception):
+                raise ocr_text
+            if isinstance(query_embedding, Exception):
+                logger.error("Question embedding failed: %s", query_embedding)
+                query_embedding = None
+        else:
+            ocr_text = await run_blocking(ocr_service.extract_text, image_bytes)
         
         if not ocr_text:
             logger.warning("No text extracted from image")
-            return CombinedResponse(
-                recognition=RecognitionResponse(candidates=[], best_product_id=None),
-                answer=None
+            return CombinedResponse.model_construct(
+                recognition=RecognitionResponse.model_construct(candidates=[], best_product_id=None)
             )
         
-        candidates = matcher_service.find_matches(ocr_text)
+        candidates = await run_blocking(matcher_service.find_matches, ocr_text)
         best_product_id = candidates[0].product_id if candidates else None
         
-        recognition = RecognitionResponse(
+        recognition = RecognitionResponse.model_construct(
             candidates=candidates,
             best_product_id=best_product_id
         )
@@ -78,46 +88,59 @@ async def recognize_and_answer(
         answer_response = None
         
         if question and best_product_id:
-            logger.info(f"Answering question for recognized product: {best_product_id}")
+            logger.info("Answering question for recognized product: %s", best_product_id)
             
             try:
-                # Retrieve context
-                context_chunks_data = rag_service.retrieve(
-                    query=question,
-                    product_id=best_product_id,
-                    top_k=3
-                )
+                # Retrieve context using the precomputed question embedding
+                context_chunks_data = []
+                if query_embedding is not None:
+                    context_chunks_data = await run_blocking(
+                        rag_service.retrieve_with_embedding,
+                        query_embedding,
+                        product_id=best_product_id,
+                        top_k=3
+                    )
                 
                 if context_chunks_data:
-                    context_texts = [chunk['text'] for chunk in context_chunks_data]
-                    context_sources = list(set([chunk['source'] for chunk in context_chunks_data]))
+                    # One pass over the chunks; sources deduplicated in retrieval order
+                    context_texts = []
+                    seen_sources = {}
+                    for chunk in context_chunks_data:
+                        context_texts.append(chunk['text'])
+                        seen_sources[chunk['source']] = None
+                    context_sources = list(seen_sources)
                     
                     # Generate answer
-                    answer = llm_service.generate_answer(question, context_texts)
+                    answer = await llm_service.generate_answer(
+                        question, context_texts, cache_key_extra=best_product_id
+                    )
                     
-                    answer_response = AnswerResponse(
+                    answer_response = AnswerResponse.model_construct(
                         answer=answer,
                         context_sources=context_sources
                     )
                 else:
-                    answer_response = AnswerResponse(
+                    answer_response = AnswerResponse.model_construct(
                         answer="No relevant information found in the product documentation.",
                         context_sources=[]
                     )
                     
             except Exception as e:
-                logger.error(f"Answer generation failed in combined endpoint: {e}")
-                answer_response = AnswerResponse(
+                logger.error("Answer generation failed in combined endpoint: %s", e)
+                answer_response = AnswerResponse.model_construct(
                     answer=f"Failed to generate answer: {str(e)}",
                     context_sources=[]
                 )
         elif question and not best_product_id:
-            answer_response = AnswerResponse(
+            answer_response = AnswerResponse.model_construct(
                 answer="Cannot answer question: product not recognized from image.",
                 context_sources=[]
             )
         
-        return CombinedResponse(
+        # Only set answer when there is one, so exclude_unset omits it otherwise
+        if answer_response is None:
+            return CombinedResponse.model_construct(recognition=recognition)
+        return CombinedResponse.model_construct(
             recognition=recognition,
             answer=answer_response
         )
@@ -125,7 +148,7 @@ async def recognize_and_answer(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Combined endpoint failed: {e}")
+        logger.error("Combined endpoint failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Processing failed: {str(e)}"
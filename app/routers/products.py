@@ -1,45 +1,34 @@
 """Products endpoint for answering questions about products."""
 
-from fastapi import APIRouter, HTTPException
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
 import logging
 
 from app.models.schemas import AnswerRequest, AnswerResponse
-from app.services.rag_service import RAGService
-from app.services.llm_service import LLMService
-from app.services.matcher_service import MatcherService
+from app.utils.concurrency import run_blocking
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
-# Service instances (will be injected via dependency)
-rag_service: Optional[RAGService] = None
-llm_service: Optional[LLMService] = None
-matcher_service: Optional[MatcherService] = None
-
-
-def set_services(rag: RAGService, llm: LLMService, matcher: MatcherService):
-    """Set service instances for the router."""
-    global rag_service, llm_service, matcher_service
-    rag_service = rag
-    llm_service = llm
-    matcher_service = matcher
-
 
 @router.post("/{product_id}/answer", response_model=AnswerResponse)
-async def answer_question(product_id: str, request: AnswerRequest):
+async def answer_question(product_id: str, body: AnswerRequest, request: Request):
     """
     Answer a question about a specific product using RAG.
     
     Args:
         product_id: Product identifier
-        request: Question and LLM usage preference
+        body: Question and LLM usage preference
+        request: Incoming request (used to reach app-scoped services)
         
     Returns:
         AnswerResponse with generated answer and sources
     """
     try:
+        rag_service = request.app.state.rag_service
+        llm_service = request.app.state.llm_service
+        matcher_service = request.app.state.matcher_service
+        
         # Validate product exists
         if not matcher_service.validate_product_id(product_id):
             raise HTTPException(
@@ -47,33 +36,46 @@ async def answer_question(product_id: str, request: AnswerRequest):
                 detail=f"Product not found: {product_id}"
             )
         
-        logger.info(f"Answering question for product: {product_id}")
+        logger.info("Answering question for product: %s", product_id)
         
-        # Retrieve relevant context chunks
-        context_chunks_data = rag_service.retrieve(
-            query=request.question,
-            product_id=product_id,
-            top_k=3
-        )
+        # Retrieve relevant context chunks; an embedding failure degrades to "no context"
+        try:
+            query_embedding = await rag_service.embed_query(body.question)
+        except Exception as e:
+            logger.error("Question embedding failed: %s", e)
+            context_chunks_data = []
+        else:
+            context_chunks_data = await run_blocking(
+                rag_service.retrieve_with_embedding,
+                query_embedding,
+                product_id=product_id,
+                top_k=3
+            )
         
         if not context_chunks_data:
-            return AnswerResponse(
+            return AnswerResponse.model_construct(
                 answer="No relevant information found in the product documentation.",
                 context_sources=[]
             )
         
-        # Extract text and sources
-        context_texts = [chunk['text'] for chunk in context_chunks_data]
-        context_sources = list(set([chunk['source'] for chunk in context_chunks_data]))
+        # Extract text and sources in one pass; sources deduplicated in retrieval order
+        context_texts = []
+        seen_sources = {}
+        for chunk in context_chunks_data:
+            context_texts.append(chunk['text'])
+            seen_sources[chunk['source']] = None
+        context_sources = list(seen_sources)
         
-        logger.info(f"Retrieved {len(context_texts)} context chunks from {len(context_sources)} sources")
+        logger.info("Retrieved %s context chunks from %s sources", len(context_texts), len(context_sources))
         
         # Generate answer using LLM
-        if request.use_external_llm:
+        if body.use_external_llm:
             try:
-                answer = llm_service.generate_answer(request.question, context_texts)
+                answer = await llm_service.generate_answer(
+                    body.question, context_texts, cache_key_extra=product_id
+                )
             except Exception as e:
-                logger.error(f"LLM generation failed: {e}")
+                logger.error("LLM generation failed: %s", e)
                 raise HTTPException(
                     status_code=500,
                     detail=str(e)
@@ -82,7 +84,7 @@ async def answer_question(product_id: str, request: AnswerRequest):
             # Fallback: return context without LLM processing
             answer = f"Based on the documentation: {context_texts[0][:300]}..."
         
-        return AnswerResponse(
+        return AnswerResponse.model_construct(
             answer=answer,
             context_sources=context_sources
         )
@@ -90,7 +92,7 @@ async def answer_question(product_id: str, request: AnswerRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Answer generation failed: {e}")
+        logger.error("Answer generation failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate answer: {str(e)}"
@@ -1,37 +1,27 @@
 """Recognition endpoint for product identification from images."""
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 import logging
 
+from app.config import settings
 from app.models.schemas import RecognitionResponse
-from app.services.ocr_service import OCRService
-from app.services.matcher_service import MatcherService
+from app.utils.concurrency import run_blocking
+from app.utils.uploads import read_upload_capped
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="", tags=["recognition"])
 
-# Service instances (will be injected via dependency)
-ocr_service: Optional[OCRService] = None
-matcher_service: Optional[MatcherService] = None
-
-
-def set_services(ocr: OCRService, matcher: MatcherService):
-    """Set service instances for the router."""
-    global ocr_service, matcher_service
-    ocr_service = ocr
-    matcher_service = matcher
-
 
 @router.post("/recognize", response_model=RecognitionResponse)
-async def recognize_product(image: UploadFile = File(...)):
+async def recognize_product(request: Request, image: UploadFile = File(...)):
     """
     Recognize a product from an uploaded image.
     
     Extracts text using OCR and matches against product catalog.
     
     Args:
+        request: Incoming request (used to reach app-scoped services)
         image: Uploaded image file (JPG, PNG, etc.)
         
     Returns:
@@ -46,25 +36,28 @@ async def recognize_product(image: UploadFile = File(...)):
             )
         
         # Read image bytes
-        image_bytes = await image.read()
-        logger.info(f"Processing image: {image.filename}, size: {len(image_bytes)} bytes")
+        image_bytes = await read_upload_capped(image, settings.max_image_bytes)
+        logger.info("Processing image: %s, size: %s bytes", image.filename, len(image_bytes))
+        
+        ocr_service = request.app.state.ocr_service
+        matcher_service = request.app.state.matcher_service
         
         # Extract text using OCR
-        ocr_text = ocr_service.extract_text(image_bytes)
+        ocr_text = await run_blocking(ocr_service.extract_text, image_bytes)
         
         if not ocr_text:
             logger.warning("No text extracted from image")
-            return RecognitionResponse(candidates=[], best_product_id=None)
+            return RecognitionResponse.model_construct(candidates=[], best_product_id=None)
         
-        logger.info(f"OCR text: {ocr_text[:100]}")
+        logger.info("OCR text: %.100s", ocr_text)
         
         # Find matching products
-        candidates = matcher_service.find_matches(ocr_text)
+        candidates = await run_blocking(matcher_service.find_matches, ocr_text)
         
         # Determine best match
         best_product_id = candidates[0].product_id if candidates else None
         
-        return RecognitionResponse(
+        return RecognitionResponse.model_construct(
             candidates=candidates,
             best_product_id=best_product_id
         )
@@ -72,7 +65,7 @@ async def recognize_product(image: UploadFile = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Recognition failed: {e}")
+        logger.error("Recognition failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Recognition failed: {str(e)}"
@@ -0,0 +1,198 @@
+"""Columnar storage for document chunks and their metadata."""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class ChunkStore:
+    """
+    Document chunks stored as parallel arrays (struct-of-arrays).
+    
+    Texts live in one UTF-8 buffer addressed by offsets; product IDs and
+    sources are int32 codes into small vocabularies. Row i of every array
+    describes chunk i, which is also its FAISS vector id. Everything is
+    plain numeric/unicode arrays, so it saves and loads without pickle.
+    """
+    
+    def __init__(
+        self,
+        text_blob: np.ndarray,
+        text_offsets: np.ndarray,
+        product_codes: np.ndarray,
+        product_vocab: np.ndarray,
+        source_codes: np.ndarray,
+        source_vocab: np.ndarray
+    ):
+        """
+        Initialize the store from its column arrays.
+        
+        Args:
+            text_blob: uint8 array holding every chunk text, UTF-8 encoded
+            text_offsets: int64 array of n + 1 byte offsets into text_blob
+            product_codes: int32 index into product_vocab, one per chunk
+            product_vocab: Unique product IDs
+            source_codes: int32 index into source_vocab, one per chunk
+            source_vocab: Unique source file names
+        """
+        self.text_blob = text_blob
+        self.text_offsets = text_offsets
+        self.product_codes = product_codes
+        self.product_vocab = product_vocab
+        self.source_codes = source_codes
+        self.source_vocab = source_vocab
+        
+        self._product_to_code = {pid: code for code, pid in enumerate(product_vocab.tolist())}
+        
+        # Chunk ids of each product, grouped once with a stable sort
+        order = np.argsort(product_codes, kind='stable').astype(np.int64)
+        bounds = np.searchsorted(product_codes[order], np.arange(len(product_vocab) + 1))
+        self._ids_by_code = [order[bounds[code]:bounds[code + 1]] for code in range(len(product_vocab))]
+    
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict]) -> "ChunkStore":
+        """
+        Build a store from chunk dictionaries.
+        
+        Args:
+            chunks: List of dicts with {text, product_id, source}
+            
+        Returns:
+            ChunkStore holding the same chunks in the same order
+        """
+        encoded = [chunk['text'].encode('utf-8') for chunk in chunks]
+        text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=text_offsets[1:])
+        text_blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        
+        product_vocab, product_codes = cls._encode_column([chunk['product_id'] for chunk in chunks])
+        source_vocab, source_codes = cls._encode_column([chunk['source'] for chunk in chunks])
+        
+        return cls(text_blob, text_offsets, product_codes, product_vocab, source_codes, source_vocab)
+    
+    @staticmethod
+    def _encode_column(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dictionary-encode a string column.
+        
+        Args:
+            values: One string per chunk
+            
+        Returns:
+            Tuple of (vocabulary, int32 codes into it)
+        """
+        vocab, codes = np.unique(np.array(values, dtype=np.str_), return_inverse=True)
+        return vocab, codes.astype(np.int32)
+    
+    @classmethod
+    def load(cls, path: Path) -> "ChunkStore":
+        """
+        Load a store written by save().
+        
+        Args:
+            path: .npz file path
+            
+        Returns:
+            Loaded ChunkStore
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in data.files})
+    
+    def save(self, path: Path):
+        """
+        Write the store to an uncompressed .npz file.
+        
+        Args:
+            path: Destination file path
+        """
+        np.savez(
+            path,
+            text_blob=self.text_blob,
+            text_offsets=self.text_offsets,
+            product_codes=self.product_codes,
+            product_vocab=self.product_vocab,
+            source_codes=self.source_codes,
+            source_vocab=self.source_vocab
+        )
+    
+    def __len__(self) -> int:
+        """Number of chunks."""
+        return len(self.product_codes)
+    
+    def text(self, idx: int) -> str:
+        """Decode the text of one chunk."""
+        start, end = self.text_offsets[idx], self.text_offsets[idx + 1]
+        return self.text_blob[start:end].tobytes().decode('utf-8')
+    
+    def product_id(self, idx: int) -> str:
+        """Product ID of one chunk."""
+        return str(self.product_vocab[self.product_codes[idx]])
+    
+    def product_code(self, product_id: str) -> int:
+        """
+        Code of a product ID in this store.
+        
+        Args:
+            product_id: Product identifier
+            
+        Returns:
+            The product's code, or -1 if no chunk belongs to it
+        """
+        return self._product_to_code.get(product_id, -1)
+    
+    def chunk_ids(self, product_id: str) -> np.ndarray:
+        """
+        Ids of all chunks belonging to a product.
+        
+        Args:
+            product_id: Product identifier
+            
+        Returns:
+            int64 array of chunk ids in ascending order (empty if unknown)
+        """
+        code = self.product_code(product_id)
+        if code < 0:
+            return np.array([], dtype=np.int64)
+        return self._ids_by_code[code]
+    
+    def take(self, ids: np.ndarray) -> List[Dict]:
+        """
+        Materialize several chunks, gathering their metadata in one pass.
+        
+        Args:
+            ids: Chunk indices
+            
+        Returns:
+            List of dicts with {text, product_id, source}, in ids order
+        """
+        product_ids = self.product_vocab.take(self.product_codes.take(ids)).tolist()
+        sources = self.source_vocab.take(self.source_codes.take(ids)).tolist()
+        starts = self.text_offsets.take(ids).tolist()
+        ends = self.text_offsets.take(ids + 1).tolist()
+        blob = self.text_blob
+        
+        return [
+            {
+                'text': blob[start:end].tobytes().decode('utf-8'),
+                'product_id': product_id,
+                'source': source
+            }
+            for start, end, product_id, source in zip(starts, ends, product_ids, sources)
+        ]
+    
+    def get(self, idx: int) -> Dict:
+        """
+        Materialize one chunk as a dictionary.
+        
+        Args:
+            idx: Chunk index
+            
+        Returns:
+            Dict with {text, product_id, source}
+        """
+        return {
+            'text': self.text(idx),
+            'product_id': self.product_id(idx),
+            'source': str(self.source_vocab[self.source_codes[idx]])
+        }
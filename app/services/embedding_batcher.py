@@ -0,0 +1,108 @@
+"""Micro-batching of concurrent embedding requests."""
+
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import logging
+
+import numpy as np
+
+from app.utils.concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce embedding requests that arrive close together into one encode call.
+    
+    The first queued text opens a short window (flush_ms); every text that
+    arrives within it, up to max_batch, is encoded in the same batch.
+    """
+    
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch: int = 32,
+        flush_ms: float = 8.0
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            encode_fn: Blocking function mapping a list of texts to an (n, d) array
+            max_batch: Maximum number of texts encoded per call
+            flush_ms: How long to wait for more texts after the first one arrives
+        """
+        self._encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.flush_ms = flush_ms
+        
+        # Created lazily so they bind to the running event loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def submit(self, text: str) -> np.ndarray:
+        """
+        Queue a text for embedding and wait for its batch to finish.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector of shape (d,)
+        """
+        self._ensure_worker()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def close(self):
+        """Stop the background worker."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+    
+    def _ensure_worker(self):
+        """Start the worker task on the current loop if it is not running there."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+    
+    async def _run(self):
+        """Collect queued texts into batches and encode them."""
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            
+            # Give concurrent requests a moment to join the batch
+            if self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.flush_ms / 1000.0)
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            # Skip callers that have already gone away
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            
+            try:
+                embeddings = await run_blocking(self._encode_fn, [text for text, _ in batch])
+            except Exception as e:
+                logger.error("Batched embedding failed: %s", e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            logger.debug("Encoded embedding batch of %s", len(batch))
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
@@ -1,9 +1,13 @@
 """LLM service for generating answers using OpenAI API."""
 
-from openai import OpenAI
-from typing import List
+from collections import OrderedDict
+from openai import AsyncOpenAI
+from typing import List, Optional
+import hashlib
 import logging
 
+import httpx
+
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -21,20 +25,45 @@ class LLMService:
         """
         self.api_key = api_key or settings.openai_api_key
         
+        # LRU cache of (product, question, context) digest -> answer
+        self._answer_cache: OrderedDict[bytes, str] = OrderedDict()
+        
         if not self.api_key:
             logger.warning("No OpenAI API key provided. LLM service will not be functional.")
             self.client = None
         else:
-            self.client = OpenAI(api_key=self.api_key)
+            # One pooled HTTP client so concurrent requests reuse keep-alive connections
+            self.client = AsyncOpenAI(
+                api_key=self.api_key,
+                max_retries=2,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+                )
+            )
             logger.info("LLM service initialized with OpenAI")
     
-    def generate_answer(self, question: str, context_chunks: List[str]) -> str:
+    async def close(self):
+        """Close the underlying HTTP connection pool."""
+        if self.client:
+            await self.client.close()
+    
+    async def generate_answer(
+        self,
+        question: str,
+        context_chunks: List[str],
+        cache_key_extra: Optional[str] = None
+    ) -> str:
         """
         Generate an answer to a question based on context chunks.
         
+        Identical (cache_key_extra, question, context) combinations are served
+        from an in-memory LRU cache instead of calling OpenAI again.
+        
         Args:
             question: User's question
             context_chunks: List of relevant text chunks for context
+            cache_key_extra: Extra cache key component, e.g. the product ID
             
         Returns:
             Generated answer
@@ -48,6 +77,13 @@ class LLMService:
                 "OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
             )
         
+        cache_key = self._cache_key(question, context_chunks, cache_key_extra)
+        cached = self._answer_cache.get(cache_key)
+        if cached is not None:
+            self._answer_cache.move_to_end(cache_key)
+            logger.debug("Answer served from cache")
+            return cached
+        
         try:
             # Combine context chunks
             context = "\n\n".join(context_chunks)
@@ -68,10 +104,10 @@ class LLMService:
             
             user_prompt = f"Context:\n{context}\n\nQuestion: {question}"
             
-            logger.debug(f"Generating answer for question: {question[:100]}")
+            logger.debug("Generating answer for question: %.100s", question)
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=settings.openai_model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -85,12 +121,17 @@ class LLMService:
             )
             
             answer = response.choices[0].message.content.strip()
-            logger.info(f"Generated answer: {len(answer)} characters")
+            logger.info("Generated answer: %s characters", len(answer))
+            
+            if settings.answer_cache_size > 0:
+                self._answer_cache[cache_key] = answer
+                if len(self._answer_cache) > settings.answer_cache_size:
+                    self._answer_cache.popitem(last=False)
             
             return answer
             
         except Exception as e:
-            logger.error(f"LLM generation failed: {e}")
+            logger.error("LLM generation failed: %s", e)
             
             # Provide helpful error messages
             if "invalid_api_key" in str(e).lower():
@@ -103,5 +144,16 @@ class LLMService:
                 )
             else:
                 raise Exception(f"Failed to generate answer: {str(e)}")
-
-
+    
+    @staticmethod
+    def _cache_key(question: str, context_chunks: List[str], extra: Optional[str]) -> bytes:
+        """Build the answer cache key from the product, question and context."""
+        context_digest = hashlib.sha256("\n".join(context_chunks).encode()).digest()
+        return hashlib.blake2b(
+            b"|".join([
+                (extra or "").encode(),
+                question.strip().lower().encode(),
+                context_digest
+            ]),
+            digest_size=16
+        ).digest()
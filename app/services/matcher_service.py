@@ -1,38 +1,91 @@
 """Product matching service using fuzzy string matching."""
 
-import pandas as pd
-from rapidfuzz import fuzz
-from typing import List
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, List, Optional
 import logging
+import threading
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 
 from app.config import settings
 from app.models.schemas import ProductCandidate
+from app.utils.concurrency import native_thread_count
 
 logger = logging.getLogger(__name__)
 
+# Columns the matcher needs from the catalog
+CATALOG_FIELDS = ('product_id', 'title', 'model', 'brand')
+
 
 class MatcherService:
     """Service for matching OCR text to products in catalog."""
     
-    def __init__(self):
-        """Initialize matcher service by loading catalog."""
-        self.catalog = self._load_catalog()
-        logger.info(f"Matcher service initialized with {len(self.catalog)} products")
+    def __init__(self, cache_size: int = None):
+        """
+        Initialize matcher service by loading catalog.
+        
+        Args:
+            cache_size: Max cached OCR texts (defaults to settings.match_cache_size)
+        """
+        # Catalog stored column-wise as parallel arrays indexed by row
+        columns = self._load_catalog()
+        self._product_ids = columns['product_id']
+        self._titles = columns['title']
+        self._models = columns['model']
+        self._brands = columns['brand']
+        
+        # Preprocess the scored fields once (lowercase, strip punctuation)
+        # so scoring can skip preprocessing on the choices
+        self._titles_proc = [default_process(str(v)) for v in self._titles]
+        self._models_proc = [default_process(str(v)) for v in self._models]
+        self._brands_proc = [default_process(str(v)) for v in self._brands]
+        
+        # O(1) product lookups, built once instead of scanning per request
+        self._pid_to_row: Dict[str, dict] = {
+            pid: {name: values[idx] for name, values in columns.items()}
+            for idx, pid in enumerate(self._product_ids.tolist())
+        }
+        self._pid_set = frozenset(self._pid_to_row)
+        
+        # Field weights in (title, model, brand) order
+        self._weights = np.array(
+            [settings.title_weight, settings.model_weight, settings.brand_weight],
+            dtype=np.float64
+        )
+        
+        # Threads per cdist call; half the cores so two concurrent requests
+        # (each already on its own pool thread) don't oversubscribe the CPU
+        self._workers = max(1, native_thread_count() // 2)
+        
+        # LRU cache of normalized OCR text digest -> candidates
+        self._cache_size = settings.match_cache_size if cache_size is None else cache_size
+        self._cache_lock = threading.Lock()
+        self._match_cache: OrderedDict[bytes, List[ProductCandidate]] = OrderedDict()
+        
+        logger.info("Matcher service initialized with %s products", len(self._product_ids))
     
-    def _load_catalog(self) -> pd.DataFrame:
+    def _load_catalog(self) -> Dict[str, np.ndarray]:
         """
         Load product catalog from CSV.
         
         Returns:
-            DataFrame with product catalog
+            Mapping of column name to an object array of values, one per product
         """
         try:
             catalog = pd.read_csv(settings.catalog_path)
-            logger.info(f"Loaded catalog with {len(catalog)} products")
-            return catalog
+            logger.info("Loaded catalog with %s products", len(catalog))
+            columns = {name: catalog[name].to_numpy(dtype=object) for name in catalog.columns}
         except Exception as e:
-            logger.error(f"Failed to load catalog: {e}")
-            return pd.DataFrame()
+            logger.error("Failed to load catalog: %s", e)
+            columns = {}
+        
+        for name in CATALOG_FIELDS:
+            columns.setdefault(name, np.array([], dtype=object))
+        return columns
     
     def find_matches(self, ocr_text: str, top_k: int = None) -> List[ProductCandidate]:
         """
@@ -45,57 +98,149 @@ class MatcherService:
         Returns:
             List of ProductCandidate objects sorted by score
         """
+        min_confidence = settings.min_confidence
         if top_k is None:
             top_k = settings.top_k_matches
         
-        if not ocr_text or self.catalog.empty:
+        if not ocr_text or len(self._product_ids) == 0:
             logger.warning("Empty OCR text or catalog")
             return []
         
-        # Normalize OCR text
-        ocr_text_normalized = ocr_text.lower().strip()
+        # Normalize OCR text the same way as the catalog fields
+        ocr_text_normalized = default_process(ocr_text)
         
-        candidates = []
+        cache_key = blake2b(
+            f"{top_k}|{ocr_text_normalized}".encode(), digest_size=16
+        ).digest()
+        with self._cache_lock:
+            cached = self._match_cache.get(cache_key)
+            if cached is not None:
+                self._match_cache.move_to_end(cache_key)
+                return self._add_ocr_evidence(cached, ocr_text)
         
-        for _, product in self.catalog.iterrows():
-            # Calculate scores for different fields
-            title_score = fuzz.token_set_ratio(ocr_text_normalized, str(product['title']).lower()) / 100.0
-            model_score = fuzz.token_set_ratio(ocr_text_normalized, str(product['model']).lower()) / 100.0
-            brand_score = fuzz.token_set_ratio(ocr_text_normalized, str(product['brand']).lower()) / 100.0
-            
-            # Calculate weighted combined score
-            combined_score = (
-                title_score * settings.title_weight +
-                model_score * settings.model_weight +
-                brand_score * settings.brand_weight
-            )
+        # Score every catalog row in one C++ call per field
+        title_scores = self._score_field(ocr_text_normalized, self._titles_proc)
+        model_scores = self._score_field(ocr_text_normalized, self._models_proc)
+        brand_scores = self._score_field(ocr_text_normalized, self._brands_proc)
+        
+        # Calculate weighted combined score for all products at once
+        field_scores = np.stack([title_scores, model_scores, brand_scores], axis=1)
+        combined_scores = field_scores @ self._weights
+        
+        # Only the surviving top-k rows are turned into candidates
+        top_candidates = []
+        for idx in self._select_top_k(combined_scores, top_k, min_confidence):
+            combined_score = float(combined_scores[idx])
+            title_score, model_score, brand_score = field_scores[idx]
             
             # Generate evidence list
             evidence = []
             if title_score > 0.6:
-                evidence.append(f"Title match: {product['title']} ({title_score:.2f})")
+                evidence.append(f"Title match: {self._titles[idx]} ({title_score:.2f})")
             if model_score > 0.6:
-                evidence.append(f"Model match: {product['model']} ({model_score:.2f})")
+                evidence.append(f"Model match: {self._models[idx]} ({model_score:.2f})")
             if brand_score > 0.6:
-                evidence.append(f"Brand match: {product['brand']} ({brand_score:.2f})")
+                evidence.append(f"Brand match: {self._brands[idx]} ({brand_score:.2f})")
             
-            # Only include if above minimum confidence
-            if combined_score >= settings.min_confidence:
-                candidate = ProductCandidate(
-                    product_id=product['product_id'],
-                    title=product['title'],
-                    score=round(combined_score, 3),
-                    evidence=evidence if evidence else [f"OCR: {ocr_text[:50]}"]
-                )
-                candidates.append(candidate)
-        
-        # Sort by score descending and return top-k
-        candidates.sort(key=lambda x: x.score, reverse=True)
-        top_candidates = candidates[:top_k]
-        
-        logger.info(f"Found {len(top_candidates)} matching products (min score: {settings.min_confidence})")
-        
-        return top_candidates
+            candidate = ProductCandidate.model_construct(
+                product_id=self._product_ids[idx],
+                title=self._titles[idx],
+                score=round(combined_score, 3),
+                evidence=evidence
+            )
+            top_candidates.append(candidate)
+        
+        logger.info("Found %s matching products (min score: %s)", len(top_candidates), min_confidence)
+        
+        if self._cache_size > 0:
+            with self._cache_lock:
+                self._match_cache[cache_key] = list(top_candidates)
+                if len(self._match_cache) > self._cache_size:
+                    self._match_cache.popitem(last=False)
+        
+        return self._add_ocr_evidence(top_candidates, ocr_text)
+    
+    @staticmethod
+    def _add_ocr_evidence(candidates: List[ProductCandidate], ocr_text: str) -> List[ProductCandidate]:
+        """
+        Use the request's OCR text as evidence for candidates without field matches.
+        
+        Cached candidates are shared by every OCR text that normalizes the
+        same way, so the raw text is added per request rather than cached.
+        
+        Args:
+            candidates: Candidates as computed or cached
+            ocr_text: Raw OCR text of this request
+            
+        Returns:
+            New list of candidates, each with non-empty evidence
+        """
+        return [
+            candidate if candidate.evidence
+            else candidate.model_copy(update={'evidence': [f"OCR: {ocr_text[:50]}"]})
+            for candidate in candidates
+        ]
+    
+    @staticmethod
+    def _select_top_k(scores: np.ndarray, top_k: int, min_confidence: float) -> np.ndarray:
+        """
+        Select the best rows without sorting the whole catalog.
+        
+        Args:
+            scores: Combined score per catalog row
+            top_k: Maximum number of rows to return
+            min_confidence: Minimum score for a row to be eligible
+            
+        Returns:
+            Row indices sorted by descending score (ties in catalog order)
+        """
+        if top_k <= 0:
+            return np.array([], dtype=np.intp)
+        
+        idx = np.flatnonzero(scores >= min_confidence)
+        if len(idx) > top_k:
+            # Keep every row tied with the k-th score so ties resolve in catalog order
+            eligible = scores[idx]
+            kth_score = eligible[np.argpartition(-eligible, top_k - 1)[top_k - 1]]
+            idx = idx[eligible >= kth_score]
+        
+        order = np.argsort(-scores[idx], kind='stable')
+        return idx[order][:top_k]
+    
+    def clear_cache(self):
+        """Drop all cached match results."""
+        with self._cache_lock:
+            self._match_cache.clear()
+    
+    def _score_field(self, query: str, choices: List[str]) -> np.ndarray:
+        """
+        Score a query against every value of one catalog field.
+        
+        Args:
+            query: Normalized OCR text
+            choices: Field values already passed through default_process
+            
+        Returns:
+            Array of scores between 0 and 1, one per catalog row
+        """
+        scores = process.cdist(
+            [query],
+            choices,
+            scorer=fuzz.token_set_ratio,
+            processor=None,
+            dtype=np.float64,
+            workers=self._workers
+        )
+        return scores[0] / 100.0
+    
+    def product_ids(self) -> List[str]:
+        """
+        List catalog product IDs.
+        
+        Returns:
+            Product IDs in catalog order
+        """
+        return [str(pid) for pid in self._product_ids.tolist()]
     
     def validate_product_id(self, product_id: str) -> bool:
         """
@@ -107,9 +252,9 @@ class MatcherService:
         Returns:
             True if product exists, False otherwise
         """
-        return product_id in self.catalog['product_id'].values
+        return product_id in self._pid_set
     
-    def get_product_info(self, product_id: str) -> dict:
+    def get_product_info(self, product_id: str) -> Optional[dict]:
         """
         Get product information by ID.
         
@@ -119,9 +264,7 @@ class MatcherService:
         Returns:
             Dictionary with product information or None
         """
-        product = self.catalog[self.catalog['product_id'] == product_id]
-        if not product.empty:
-            return product.iloc[0].to_dict()
-        return None
+        row = self._pid_to_row.get(product_id)
+        return dict(row) if row is not None else None
 
 
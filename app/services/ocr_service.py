@@ -1,20 +1,41 @@
 """OCR service for text extraction from images."""
 
-import pytesseract
-from PIL import Image
+from collections import OrderedDict
+from hashlib import sha256
 import logging
+import threading
 import re
 
-from app.utils.image_processing import load_image_from_bytes, preprocess_for_ocr
+import pytesseract
+from PIL import Image
+
+from app.config import settings
+from app.utils.image_processing import preprocess_bytes_for_ocr, preprocess_for_ocr
 
 logger = logging.getLogger(__name__)
 
+# Assume a single uniform block of text (product labels, packaging)
+TESSERACT_CONFIG = '--psm 6'
+
+# Compiled once for _clean_text
+WHITESPACE_PATTERN = re.compile(r'\s+')
+DISALLOWED_CHARS_PATTERN = re.compile(r'[^\w\s\-.,]')
+
 
 class OCRService:
     """Service for extracting text from images using Tesseract OCR."""
     
-    def __init__(self):
-        """Initialize OCR service."""
+    def __init__(self, cache_size: int = None):
+        """
+        Initialize OCR service.
+        
+        Args:
+            cache_size: Max cached images (defaults to settings.ocr_cache_size)
+        """
+        # LRU cache of image bytes digest -> cleaned OCR text
+        self._cache_size = settings.ocr_cache_size if cache_size is None else cache_size
+        self._cache_lock = threading.Lock()
+        self._text_cache: OrderedDict[bytes, str] = OrderedDict()
         logger.info("OCR service initialized")
     
     def extract_text(self, image_bytes: bytes) -> str:
@@ -27,28 +48,52 @@ class OCRService:
         Returns:
             Extracted and cleaned text
         """
+        # Too small to contain readable text
+        if len(image_bytes) < settings.min_image_bytes:
+            logger.debug("Skipping OCR for %s byte image", len(image_bytes))
+            return ""
+        
+        cache_key = sha256(image_bytes).digest()
+        with self._cache_lock:
+            cached = self._text_cache.get(cache_key)
+            if cached is not None:
+                self._text_cache.move_to_end(cache_key)
+                return cached
+        
         try:
-            # Load image from bytes
-            image = load_image_from_bytes(image_bytes)
-            logger.debug(f"Image loaded: {image.size}, mode: {image.mode}")
-            
-            # Preprocess image for better OCR results
-            processed_image = preprocess_for_ocr(image)
+            # Decode and preprocess image for better OCR results
+            processed_image = preprocess_bytes_for_ocr(image_bytes)
             
             # Extract text using Tesseract
-            text = pytesseract.image_to_string(processed_image, config='--psm 6')
-            logger.info(f"OCR extracted {len(text)} characters")
+            text = pytesseract.image_to_string(processed_image, config=TESSERACT_CONFIG)
+            logger.info("OCR extracted %s characters", len(text))
             
             # Clean and normalize text
             cleaned_text = self._clean_text(text)
-            logger.debug(f"Cleaned text: {cleaned_text[:100]}...")
+            logger.debug("Cleaned text: %.100s...", cleaned_text)
+            
+            if self._cache_size > 0:
+                with self._cache_lock:
+                    self._text_cache[cache_key] = cleaned_text
+                    if len(self._text_cache) > self._cache_size:
+                        self._text_cache.popitem(last=False)
             
             return cleaned_text
             
         except Exception as e:
-            logger.error(f"OCR extraction failed: {e}")
+            logger.error("OCR extraction failed: %s", e)
             return ""
     
+    def warmup(self):
+        """Run Tesseract once on a blank image so its language data is loaded."""
+        blank = preprocess_for_ocr(Image.new('RGB', (64, 32), color='white'))
+        pytesseract.image_to_string(blank, config=TESSERACT_CONFIG)
+    
+    def clear_cache(self):
+        """Drop all cached OCR results."""
+        with self._cache_lock:
+            self._text_cache.clear()
+    
     def _clean_text(self, text: str) -> str:
         """
         Clean and normalize extracted text.
@@ -60,10 +105,10 @@ class OCRService:
             Cleaned text
         """
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = WHITESPACE_PATTERN.sub(' ', text)
         
         # Remove special characters but keep alphanumeric and basic punctuation
-        text = re.sub(r'[^\w\s\-.,]', '', text)
+        text = DISALLOWED_CHARS_PATTERN.sub('', text)
         
         # Strip leading/trailing whitespace
         text = text.strip()
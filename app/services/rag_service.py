@@ -1,29 +1,271 @@
 """RAG service for document retrieval using embeddings and FAISS."""
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict
-import pickle
+from typing import List, Dict, Tuple
 import logging
+import re
 
 import numpy as np
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
 
 from app.config import settings
+from app.services.chunk_store import ChunkStore
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.utils.concurrency import native_thread_count
 
 logger = logging.getLogger(__name__)
 
+# Threads reading and chunking documents during build_index
+DOC_READ_WORKERS = 8
+
+# A word is any run of non-whitespace, matching str.split()
+WORD_PATTERN = re.compile(r'\S+')
+
+# Weight dtypes selectable through settings.embedding_precision
+PRECISION_DTYPES = {
+    'fp32': torch.float32,
+    'fp16': torch.float16,
+    'bf16': torch.bfloat16,
+}
+
+
+def _cpu_supports_bf16() -> bool:
+    """Check whether the CPU has native BF16 matmul instructions."""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            cpuinfo = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in cpuinfo or 'amx_bf16' in cpuinfo
+
+
+@lru_cache(maxsize=4)
+def load_embedding_model(
+    model_name: str,
+    backend: str = 'torch',
+    precision: str = 'auto',
+    compile_model: bool = False
+) -> SentenceTransformer:
+    """
+    Load an embedding model once per process.
+    
+    Every RAGService (and anything else embedding text) shares the same
+    weights instead of loading its own copy. The ONNX backend runs the
+    INT8-quantized export in settings.onnx_model_dir (see
+    tools/export_onnx.py); if it cannot be loaded the torch model is
+    used instead.
+    
+    Args:
+        model_name: SentenceTransformer model name or path
+        backend: "torch" or "onnx"
+        precision: Weight precision for the torch backend (auto, fp32, fp16, bf16)
+        compile_model: Compile the torch backend with torch.compile
+        
+    Returns:
+        Loaded SentenceTransformer
+    """
+    if backend.lower() == 'onnx':
+        try:
+            model = _load_onnx_model()
+            logger.info("Loaded ONNX embedding model from %s", settings.onnx_model_dir)
+            return model
+        except ImportError as e:
+            logger.warning("ONNX runtime not installed (%s), falling back to torch", e)
+        except Exception as e:
+            logger.warning("Failed to load ONNX model: %s, falling back to torch", e)
+    
+    logger.info("Loading embedding model: %s", model_name)
+    model = _apply_precision(SentenceTransformer(model_name), precision)
+    if compile_model:
+        model = _compile_model(model)
+    return model
+
+
+def _load_onnx_model() -> SentenceTransformer:
+    """Load the quantized ONNX export with one intra-op thread per physical core."""
+    import onnxruntime
+    
+    session_options = onnxruntime.SessionOptions()
+    # Assume two hardware threads per core; VNNI units are per physical core
+    session_options.intra_op_num_threads = max(1, native_thread_count() // 2)
+    
+    return SentenceTransformer(
+        str(settings.onnx_model_dir),
+        backend='onnx',
+        model_kwargs={
+            'file_name': settings.onnx_model_file,
+            'provider': 'CPUExecutionProvider',
+            'session_options': session_options,
+        }
+    )
+
+
+def _apply_precision(model: SentenceTransformer, precision: str) -> SentenceTransformer:
+    """
+    Cast the embedding model weights to the requested precision.
+    
+    "auto" uses FP16 on CUDA, BF16 on CPUs with native BF16 support
+    and FP32 otherwise. Embeddings are upcast to float32 before
+    normalization, see RAGService._encode.
+    
+    Args:
+        model: Torch-backed embedding model
+        precision: auto, fp32, fp16 or bf16
+        
+    Returns:
+        The model with weights in the selected dtype
+    """
+    resolved = precision.lower()
+    if resolved == 'auto':
+        if model.device.type == 'cuda':
+            resolved = 'fp16'
+        elif _cpu_supports_bf16():
+            resolved = 'bf16'
+        else:
+            resolved = 'fp32'
+    
+    dtype = PRECISION_DTYPES.get(resolved)
+    if dtype is None:
+        logger.warning("Unknown embedding precision %r, using fp32", precision)
+        return model
+    
+    if dtype is not torch.float32:
+        model = model.to(dtype=dtype)
+    logger.info("Embedding model running in %s", resolved)
+    return model
+
+
+def _compile_model(model: SentenceTransformer) -> SentenceTransformer:
+    """
+    Compile the transformer backbone with torch.compile.
+    
+    Shapes are marked dynamic so new batch sizes and sequence lengths
+    don't each trigger a recompile. Two warmup encodes pay for the
+    initial compiles before the first real query. Falls back to eager
+    mode if compilation fails.
+    
+    Args:
+        model: Torch-backed embedding model
+        
+    Returns:
+        The same model with a compiled backbone forward
+    """
+    backbone = model[0].auto_model
+    eager_forward = backbone.forward
+    # CUDA graphs only pay off on GPU
+    mode = 'reduce-overhead' if model.device.type == 'cuda' else 'default'
+    
+    try:
+        backbone.forward = torch.compile(eager_forward, mode=mode, dynamic=True)
+        model.encode(['warmup'])
+        model.encode(['warmup', 'warmup batch'])
+        logger.info("Embedding model compiled (%s mode)", mode)
+    except Exception as e:
+        backbone.forward = eager_forward
+        logger.warning("torch.compile failed, using eager mode: %s", e)
+    
+    return model
+
+
+@lru_cache(maxsize=2)
+def _read_index_files(
+    index_file: str,
+    chunks_file: str,
+    embeddings_file: str,
+    mtimes: Tuple[int, int, int]
+) -> Tuple[faiss.Index, ChunkStore, Dict[str, faiss.Index]]:
+    """
+    Read a saved index and its chunks once per file version.
+    
+    The modification times are part of the cache key, so a rebuilt
+    index on disk is read again while repeated loads of the same files
+    share one copy.
+    
+    Args:
+        index_file: Path of index.faiss
+        chunks_file: Path of chunks.npz
+        embeddings_file: Path of embeddings.npy
+        mtimes: Modification times of the three files in ns
+        
+    Returns:
+        Tuple of (FAISS index, ChunkStore, per-product indexes)
+    """
+    # faiss-cpu 1.7.4 only memory-maps IVF inverted lists, so HNSW-SQ codes are read into RAM
+    index = faiss.read_index(index_file)
+    chunks = ChunkStore.load(chunks_file)
+    # Only each product's rows are paged in while copying them into its index
+    embeddings = np.load(embeddings_file, mmap_mode='r')
+    return index, chunks, build_product_indexes(embeddings, chunks, index)
+
+
+def build_product_indexes(
+    embeddings: np.ndarray,
+    chunks: ChunkStore,
+    index: faiss.Index
+) -> Dict[str, faiss.Index]:
+    """
+    Build one exhaustive 8-bit scalar-quantized index per product.
+    
+    Each product has only a few dozen chunks, so a brute-force scan of
+    its own codes is optimal and product-filtered queries never touch
+    other products' vectors. The codes reuse the global index's trained
+    ranges, so they match what the global index stores.
+    
+    Args:
+        embeddings: Normalized chunk embeddings, row i for chunk i
+        chunks: Chunk metadata matching the embedding rows
+        index: Trained global index
+        
+    Returns:
+        Mapping of product ID to an IndexIDMap2 returning global chunk ids
+    """
+    dimension = embeddings.shape[1]
+    template = faiss.IndexScalarQuantizer(
+        dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+    )
+    storage = faiss.downcast_index(index.storage) if isinstance(index, faiss.IndexHNSW) else index
+    if isinstance(storage, faiss.IndexScalarQuantizer) and storage.sq.qtype == template.sq.qtype:
+        template.sq = storage.sq
+        template.is_trained = True
+    else:
+        template.train(np.ascontiguousarray(embeddings, dtype=np.float32))
+    
+    indexes = {}
+    for product_id in chunks.product_vocab.tolist():
+        chunk_ids = chunks.chunk_ids(product_id)
+        product_index = faiss.IndexIDMap2(faiss.clone_index(template))
+        product_index.add_with_ids(np.ascontiguousarray(embeddings[chunk_ids], dtype=np.float32), chunk_ids)
+        indexes[product_id] = product_index
+    return indexes
+
 
 class RAGService:
     """Service for Retrieval-Augmented Generation using FAISS and embeddings."""
     
     def __init__(self):
         """Initialize RAG service with embedding model and FAISS index."""
-        logger.info(f"Loading embedding model: {settings.embedding_model}")
-        self.model = SentenceTransformer(settings.embedding_model)
+        self.model = load_embedding_model(
+            settings.embedding_model,
+            settings.embedding_backend,
+            settings.embedding_precision,
+            settings.compile_embedding_model
+        )
         
         self.index = None
-        self.chunks = []  # List of dicts with {text, product_id, source}
+        self.chunks = ChunkStore.from_chunks([])  # chunk i is FAISS vector i
+        self._product_indexes: Dict[str, faiss.Index] = {}  # product_id -> SQ8 flat index
+        self._gpu_resources = None  # kept alive while the indexes live on GPU
+        
+        # Coalesces concurrent query embeddings into batched encode calls
+        self._batcher = EmbeddingBatcher(
+            self._encode_queries,
+            max_batch=settings.embedding_batch_max,
+            flush_ms=settings.embedding_batch_flush_ms
+        )
         
         # Try to load existing index, otherwise build new one
         if self._index_exists():
@@ -35,8 +277,9 @@ class RAGService:
     def _index_exists(self) -> bool:
         """Check if FAISS index files exist."""
         index_file = settings.faiss_index_dir / "index.faiss"
-        chunks_file = settings.faiss_index_dir / "chunks.pkl"
-        return index_file.exists() and chunks_file.exists()
+        chunks_file = settings.faiss_index_dir / "chunks.npz"
+        embeddings_file = settings.faiss_index_dir / "embeddings.npy"
+        return index_file.exists() and chunks_file.exists() and embeddings_file.exists()
     
     def build_index(self):
         """
@@ -48,44 +291,131 @@ class RAGService:
         logger.info("Building FAISS index from documents...")
         
         # Read and chunk all documents
-        self.chunks = []
+        self.chunks = ChunkStore.from_chunks([])
+        self._product_indexes = {}
+        chunks = []
         docs_dir = Path(settings.docs_dir)
         
         if not docs_dir.exists():
-            logger.error(f"Documents directory not found: {docs_dir}")
+            logger.error("Documents directory not found: %s", docs_dir)
             return
         
-        for doc_file in docs_dir.glob("*.txt"):
-            product_id = doc_file.stem
-            logger.debug(f"Processing document: {doc_file.name}")
-            
-            with open(doc_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Chunk the document
-            doc_chunks = self._chunk_document(content, product_id, doc_file.name)
-            self.chunks.extend(doc_chunks)
+        doc_files = list(docs_dir.glob("*.txt"))
         
-        logger.info(f"Created {len(self.chunks)} chunks from {len(list(docs_dir.glob('*.txt')))} documents")
+        # Overlap file reads; map() keeps results in doc_files order
+        with ThreadPoolExecutor(max_workers=max(1, min(DOC_READ_WORKERS, len(doc_files)))) as executor:
+            for doc_chunks in executor.map(self._read_and_chunk, doc_files):
+                chunks.extend(doc_chunks)
         
-        if not self.chunks:
+        logger.info("Created %s chunks from %s documents", len(chunks), len(doc_files))
+        
+        if not chunks:
             logger.error("No chunks created, cannot build index")
             return
         
+        self.chunks = ChunkStore.from_chunks(chunks)
+        
         # Generate embeddings for all chunks
-        chunk_texts = [chunk['text'] for chunk in self.chunks]
+        chunk_texts = [chunk['text'] for chunk in chunks]
         logger.info("Generating embeddings...")
-        embeddings = self.model.encode(chunk_texts, show_progress_bar=False)
+        # encode() sorts texts by length internally, so each batch pads little
+        embeddings = self._encode(chunk_texts, batch_size=settings.embedding_batch_size)
         
         # Create FAISS index
         dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(embeddings.astype('float32'))
+        self.index = self._create_index(dimension)
+        self.index.train(embeddings)  # learns per-dimension ranges for int8 codes
+        self.index.add(embeddings)
+        self._configure_search()
+        self._product_indexes = build_product_indexes(embeddings, self.chunks, self.index)
+        
+        logger.info("FAISS index created with %s vectors", self.index.ntotal)
+        
+        # Save index, chunks and embeddings
+        self._save_index(embeddings)
+        self._move_indexes_to_gpu(embeddings)
+    
+    def _create_index(self, dimension: int) -> faiss.Index:
+        """
+        Create an empty HNSW index over 8-bit scalar-quantized vectors.
+        
+        Embeddings are L2-normalized, so inner product equals cosine
+        similarity and search runs as a plain dot product. Storing one
+        byte per dimension cuts index memory and bytes scanned by 4x.
+        
+        Args:
+            dimension: Embedding dimension
+            
+        Returns:
+            FAISS index ready for train() and add()
+        """
+        index = faiss.IndexHNSWSQ(
+            dimension,
+            faiss.ScalarQuantizer.QT_8bit,
+            settings.hnsw_m,
+            faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = settings.hnsw_ef_construction
+        return index
+    
+    def _configure_search(self):
+        """Apply query-time search parameters to the current index."""
+        if isinstance(self.index, faiss.IndexHNSW):
+            self.index.hnsw.efSearch = settings.hnsw_ef_search
+    
+    def _move_indexes_to_gpu(self, embeddings: np.ndarray):
+        """
+        Serve searches from GPU 0 when faiss-gpu and a GPU are available.
+        
+        FAISS has no GPU version of HNSW or flat scalar-quantized indexes,
+        so exact float32 flat indexes are built on the GPU from the
+        embeddings instead: one over all chunks and one per product. The
+        CPU indexes stay in use if anything fails.
+        
+        Args:
+            embeddings: Normalized chunk embeddings, row i for chunk i
+        """
+        if not settings.use_gpu_index or not hasattr(faiss, 'StandardGpuResources'):
+            return
+        if faiss.get_num_gpus() == 0:
+            return
+        
+        try:
+            self._gpu_resources = faiss.StandardGpuResources()
+            dimension = embeddings.shape[1]
+            
+            index = faiss.GpuIndexFlatIP(self._gpu_resources, dimension)
+            index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+            
+            product_indexes = {}
+            for product_id in self._product_indexes:
+                chunk_ids = self.chunks.chunk_ids(product_id)
+                product_index = faiss.IndexIDMap2(faiss.GpuIndexFlatIP(self._gpu_resources, dimension))
+                product_index.add_with_ids(np.ascontiguousarray(embeddings[chunk_ids], dtype=np.float32), chunk_ids)
+                product_indexes[product_id] = product_index
+            
+            self.index, self._product_indexes = index, product_indexes
+            logger.info("FAISS indexes moved to GPU")
+        except Exception as e:
+            self._gpu_resources = None
+            logger.info("Keeping FAISS indexes on CPU: %s", e)
+    
+    def _read_and_chunk(self, doc_file: Path) -> List[Dict]:
+        """
+        Read one document and split it into chunks.
+        
+        Args:
+            doc_file: Path of a .txt document named after its product ID
+            
+        Returns:
+            List of chunk dictionaries
+        """
+        logger.debug("Processing document: %s", doc_file.name)
         
-        logger.info(f"FAISS index created with {self.index.ntotal} vectors")
+        with open(doc_file, 'r', encoding='utf-8') as f:
+            content = f.read()
         
-        # Save index and chunks
-        self._save_index()
+        return self._chunk_document(content, doc_file.stem, doc_file.name)
     
     def _chunk_document(self, content: str, product_id: str, source: str) -> List[Dict]:
         """
@@ -99,18 +429,27 @@ class RAGService:
         Returns:
             List of chunk dictionaries
         """
-        words = content.split()
-        chunks = []
+        # (start, end) character offsets of every word in the document
+        spans = np.array(
+            [match.span() for match in WORD_PATTERN.finditer(content)],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        word_starts, word_ends = spans[:, 0], spans[:, 1]
         
         chunk_size = settings.chunk_size
         overlap = settings.chunk_overlap
         
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk_words = words[i:i + chunk_size]
-            if len(chunk_words) < 20:  # Skip very small chunks
-                continue
-            
-            chunk_text = ' '.join(chunk_words)
+        # First and last word of every window
+        first_words = np.arange(0, len(spans), chunk_size - overlap)
+        last_words = np.minimum(first_words + chunk_size, len(spans)) - 1
+        
+        # Skip very small chunks
+        keep = (last_words - first_words + 1) >= 20
+        
+        chunks = []
+        for first, last in zip(first_words[keep], last_words[keep]):
+            # Slice the document directly instead of re-joining words
+            chunk_text = content[word_starts[first]:word_ends[last]]
             chunks.append({
                 'text': chunk_text,
                 'product_id': product_id,
@@ -119,41 +458,107 @@ class RAGService:
         
         return chunks
     
-    def _save_index(self):
-        """Save FAISS index and chunks metadata to disk."""
+    def _save_index(self, embeddings: np.ndarray):
+        """
+        Save FAISS index, chunks metadata and embeddings to disk.
+        
+        Args:
+            embeddings: Normalized chunk embeddings, used to rebuild the per-product indexes
+        """
         try:
             settings.faiss_index_dir.mkdir(parents=True, exist_ok=True)
             
             index_file = settings.faiss_index_dir / "index.faiss"
-            chunks_file = settings.faiss_index_dir / "chunks.pkl"
+            chunks_file = settings.faiss_index_dir / "chunks.npz"
+            embeddings_file = settings.faiss_index_dir / "embeddings.npy"
             
             faiss.write_index(self.index, str(index_file))
+            self.chunks.save(chunks_file)
+            np.save(embeddings_file, embeddings)
             
-            with open(chunks_file, 'wb') as f:
-                pickle.dump(self.chunks, f)
-            
-            logger.info(f"Index saved to {settings.faiss_index_dir}")
+            logger.info("Index saved to %s", settings.faiss_index_dir)
             
         except Exception as e:
-            logger.error(f"Failed to save index: {e}")
+            logger.error("Failed to save index: %s", e)
     
     def _load_index(self):
         """Load FAISS index and chunks metadata from disk."""
         try:
             index_file = settings.faiss_index_dir / "index.faiss"
-            chunks_file = settings.faiss_index_dir / "chunks.pkl"
-            
-            self.index = faiss.read_index(str(index_file))
+            chunks_file = settings.faiss_index_dir / "chunks.npz"
+            embeddings_file = settings.faiss_index_dir / "embeddings.npy"
             
-            with open(chunks_file, 'rb') as f:
-                self.chunks = pickle.load(f)
+            files = (index_file, chunks_file, embeddings_file)
+            mtimes = tuple(path.stat().st_mtime_ns for path in files)
+            self.index, self.chunks, self._product_indexes = _read_index_files(
+                *(str(path) for path in files), mtimes
+            )
+            if self.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                logger.info("Stored index does not use inner product, rebuilding...")
+                self.build_index()
+                return
+            self._configure_search()
+            self._move_indexes_to_gpu(np.load(embeddings_file, mmap_mode='r'))
             
-            logger.info(f"Index loaded: {self.index.ntotal} vectors, {len(self.chunks)} chunks")
+            logger.info("Index loaded: %s vectors, %s chunks", self.index.ntotal, len(self.chunks))
             
         except Exception as e:
-            logger.error(f"Failed to load index: {e}")
+            logger.error("Failed to load index: %s", e)
             self.build_index()
     
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Embed texts and L2-normalize them in float32.
+        
+        Normalizing after the upcast keeps unit norms exact when the
+        model runs in FP16/BF16.
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per forward pass
+            
+        Returns:
+            L2-normalized embeddings of shape (len(texts), dimension) as float32
+        """
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed a batch of search queries.
+        
+        Args:
+            queries: Search queries
+            
+        Returns:
+            L2-normalized query embeddings of shape (len(queries), dimension) as float32
+        """
+        return self._encode(queries, batch_size=len(queries))
+    
+    async def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query, batched with other concurrent queries.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Query embedding of shape (1, dimension) as float32
+        """
+        embedding = await self._batcher.submit(query)
+        return embedding.reshape(1, -1)
+    
+    async def close(self):
+        """Stop the embedding batcher."""
+        await self._batcher.close()
+    
     def retrieve(self, query: str, product_id: str = None, top_k: int = None) -> List[Dict]:
         """
         Retrieve relevant text chunks for a query.
@@ -163,6 +568,35 @@ class RAGService:
             product_id: Optional product ID to filter results
             top_k: Number of results to return (defaults to settings.top_k_retrieval)
             
+        Returns:
+            List of relevant chunks with metadata
+        """
+        if not self.index or not self.chunks:
+            logger.error("Index not initialized")
+            return []
+        
+        try:
+            query_embedding = self._encode_queries([query])
+        except Exception as e:
+            logger.error("Retrieval failed: %s", e)
+            return []
+        
+        return self.retrieve_with_embedding(query_embedding, product_id=product_id, top_k=top_k)
+    
+    def retrieve_with_embedding(
+        self,
+        query_embedding: np.ndarray,
+        product_id: str = None,
+        top_k: int = None
+    ) -> List[Dict]:
+        """
+        Retrieve relevant text chunks for a precomputed query embedding.
+        
+        Args:
+            query_embedding: Query embedding of shape (1, dimension), e.g. from embed_query
+            product_id: Optional product ID to filter results
+            top_k: Number of results to return (defaults to settings.top_k_retrieval)
+            
         Returns:
             List of relevant chunks with metadata
         """
@@ -173,35 +607,52 @@ class RAGService:
             logger.error("Index not initialized")
             return []
         
+        if product_id and product_id not in self._product_indexes:
+            logger.info("No chunks for product %s", product_id)
+            return []
+        
         try:
-            # Generate query embedding
-            query_embedding = self.model.encode([query])
-            
-            # Search in FAISS index
-            # Search more than needed if filtering by product_id
-            search_k = top_k * 5 if product_id else top_k
-            distances, indices = self.index.search(query_embedding.astype('float32'), search_k)
-            
-            # Retrieve chunks
-            results = []
-            for idx in indices[0]:
-                if idx < len(self.chunks):
-                    chunk = self.chunks[idx]
-                    
-                    # Filter by product_id if specified
-                    if product_id and chunk['product_id'] != product_id:
-                        continue
-                    
-                    results.append(chunk)
-                    
-                    if len(results) >= top_k:
-                        break
-            
-            logger.info(f"Retrieved {len(results)} chunks for query")
+            scores, indices = self._search(query_embedding, top_k, product_id)
+            
+            results = self._collect_chunks(indices[0], top_k)
+            logger.info("Retrieved %s chunks for query", len(results))
             return results
             
         except Exception as e:
-            logger.error(f"Retrieval failed: {e}")
+            logger.error("Retrieval failed: %s", e)
             return []
-
-
+    
+    def _search(self, query_embeddings: np.ndarray, top_k: int, product_id: str = None):
+        """
+        Search the product's own index, or the global index if no product is given.
+        
+        Routing to a per-product index means no over-fetching or
+        post-filtering is needed.
+        
+        Args:
+            query_embeddings: Query embeddings of shape (n, dimension)
+            top_k: Number of neighbors per query
+            product_id: Optional product ID to restrict the search to
+            
+        Returns:
+            Tuple of (scores, chunk ids), each of shape (n, top_k)
+        """
+        if not product_id:
+            return self.index.search(query_embeddings, top_k)
+        return self._product_indexes[product_id].search(query_embeddings, top_k)
+    
+    def _collect_chunks(self, indices: np.ndarray, top_k: int) -> List[Dict]:
+        """
+        Turn one row of search hits into chunks.
+        
+        Args:
+            indices: Chunk ids from one query, best first
+            top_k: Maximum number of chunks to return
+            
+        Returns:
+            List of relevant chunks with metadata
+        """
+        hits = indices[:top_k]
+        # FAISS pads with -1 when fewer than top_k neighbors are found
+        hits = hits[(hits >= 0) & (hits < len(self.chunks))]
+        return self.chunks.take(hits)
@@ -0,0 +1,80 @@
+"""Helpers for running blocking work off the event loop."""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+import asyncio
+import logging
+import os
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Thread-count variables read by OpenMP, MKL and OpenBLAS
+NATIVE_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on (respects affinity/cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+# Shared, bounded pool for blocking service calls (OCR, matching, retrieval, LLM)
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.worker_threads or available_cpus(),
+    thread_name_prefix="service-worker"
+)
+
+
+def native_thread_count() -> int:
+    """Threads for native compute pools: settings.app_threads or the available CPUs."""
+    return settings.app_threads or available_cpus()
+
+
+def set_native_thread_env():
+    """
+    Export OpenMP, MKL and OpenBLAS thread counts.
+    
+    These libraries read the variables once, when they are loaded, so
+    this must run before numpy, torch or faiss is imported. Explicitly
+    set environment variables are left untouched.
+    """
+    threads = str(native_thread_count())
+    for name in NATIVE_THREAD_ENV_VARS:
+        os.environ.setdefault(name, threads)
+
+
+def configure_native_threads():
+    """
+    Pin the torch and FAISS thread pools to native_thread_count().
+    
+    Without this each library sizes its pool from the host's core count,
+    which oversubscribes CPUs in containers limited to a few cores.
+    """
+    import faiss
+    import torch
+    
+    threads = native_thread_count()
+    torch.set_num_threads(threads)
+    faiss.omp_set_num_threads(threads)
+    logger.info("Native thread pools set to %s threads", threads)
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking function in the shared thread pool.
+    
+    Args:
+        func: Synchronous callable
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+        
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, partial(func, *args, **kwargs))
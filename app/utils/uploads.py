@@ -0,0 +1,34 @@
+"""Helpers for reading uploaded files."""
+
+from fastapi import HTTPException, UploadFile
+
+# Bytes requested from the upload per read call
+READ_CHUNK_SIZE = 64 * 1024
+
+
+async def read_upload_capped(upload: UploadFile, limit: int) -> bytes:
+    """
+    Read an uploaded file in chunks, refusing anything larger than a limit.
+    
+    Args:
+        upload: Uploaded file
+        limit: Maximum accepted size in bytes
+        
+    Returns:
+        File contents
+        
+    Raises:
+        HTTPException: 413 as soon as the upload exceeds the limit
+    """
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image too large. Maximum size is {limit} bytes."
+            )
+    return bytes(buffer)
@@ -0,0 +1,61 @@
+"""Unit tests for columnar chunk storage."""
+
+import numpy as np
+
+from app.services.chunk_store import ChunkStore
+
+CHUNKS = [
+    {"text": "Écran 6,7 pouces", "product_id": "iphone-15-pro-max", "source": "iphone-15-pro-max.txt"},
+    {"text": "Battery: 5000 mAh", "product_id": "galaxy-s24", "source": "galaxy-s24.txt"},
+    {"text": "チップ: A17 Pro", "product_id": "iphone-15-pro-max", "source": "iphone-15-pro-max.txt"},
+    {"text": "Kamera 50 MP – 📷", "product_id": "galaxy-s24", "source": "galaxy-s24.txt"},
+    {"text": "", "product_id": "pixel-8", "source": "pixel-8.txt"},
+]
+
+
+def test_save_load_round_trip(tmp_path):
+    """Test non-ASCII text and several products survive save/load."""
+    path = tmp_path / "chunks.npz"
+    ChunkStore.from_chunks(CHUNKS).save(path)
+    
+    store = ChunkStore.load(path)
+    
+    assert len(store) == len(CHUNKS)
+    assert [store.get(idx) for idx in range(len(store))] == CHUNKS
+    assert store.text(2) == "チップ: A17 Pro"
+    assert store.product_id(3) == "galaxy-s24"
+
+
+def test_take_preserves_ids_order():
+    """Test take() returns chunks in the order of the requested ids."""
+    store = ChunkStore.from_chunks(CHUNKS)
+    
+    taken = store.take(np.array([3, 0, 4, 0], dtype=np.int64))
+    
+    assert taken == [CHUNKS[3], CHUNKS[0], CHUNKS[4], CHUNKS[0]]
+
+
+def test_chunk_ids_by_product():
+    """Test chunk ids of known products are ascending and unknown ones are empty."""
+    store = ChunkStore.from_chunks(CHUNKS)
+    
+    assert store.chunk_ids("iphone-15-pro-max").tolist() == [0, 2]
+    assert store.chunk_ids("galaxy-s24").tolist() == [1, 3]
+    assert store.chunk_ids("pixel-8").tolist() == [4]
+    
+    unknown = store.chunk_ids("nokia-3310")
+    assert unknown.dtype == np.int64
+    assert len(unknown) == 0
+    assert store.product_code("nokia-3310") == -1
+
+
+def test_empty_store(tmp_path):
+    """Test a store without chunks can be built, saved and loaded."""
+    path = tmp_path / "chunks.npz"
+    ChunkStore.from_chunks([]).save(path)
+    
+    store = ChunkStore.load(path)
+    
+    assert len(store) == 0
+    assert store.take(np.array([], dtype=np.int64)) == []
+    assert len(store.chunk_ids("iphone-15-pro-max")) == 0
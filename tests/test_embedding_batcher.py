@@ -0,0 +1,105 @@
+"""Unit tests for micro-batching of query embeddings."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Encode function that records every batch it receives."""
+    
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+    
+    def __call__(self, texts: list) -> np.ndarray:
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("encoder failed")
+        # Row i encodes the length of text i so results can be matched to callers
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_submits_share_one_encode_call():
+    """Test texts submitted together are encoded in a single batch."""
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch=8, flush_ms=20)
+    texts = ["a", "bb", "ccc", "dddd"]
+    
+    async def run():
+        try:
+            return await asyncio.gather(*(batcher.submit(text) for text in texts))
+        finally:
+            await batcher.close()
+    
+    results = asyncio.run(run())
+    
+    assert encoder.batches == [texts]
+    assert [float(result[0]) for result in results] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_encode_error_reaches_every_caller():
+    """Test an encode failure is raised in every waiting submit."""
+    encoder = RecordingEncoder(fail=True)
+    batcher = EmbeddingBatcher(encoder, max_batch=8, flush_ms=20)
+    
+    async def run():
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(text) for text in ["a", "b", "c"]),
+                return_exceptions=True
+            )
+        finally:
+            await batcher.close()
+    
+    results = asyncio.run(run())
+    
+    assert len(encoder.batches) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_callers_are_skipped():
+    """Test a caller cancelled while waiting is left out of the batch."""
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch=8, flush_ms=50)
+    
+    async def run():
+        try:
+            gone = asyncio.create_task(batcher.submit("gone"))
+            kept = asyncio.create_task(batcher.submit("kept"))
+            await asyncio.sleep(0.01)  # both queued, flush window still open
+            gone.cancel()
+            result = await kept
+            with pytest.raises(asyncio.CancelledError):
+                await gone
+            return result
+        finally:
+            await batcher.close()
+    
+    result = asyncio.run(run())
+    
+    assert encoder.batches == [["kept"]]
+    assert float(result[0]) == 4.0
+
+
+def test_worker_rebinds_to_new_event_loop():
+    """Test the batcher keeps working when used from a second event loop."""
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch=8, flush_ms=1)
+    loops = []
+    
+    async def run(text: str):
+        result = await batcher.submit(text)
+        loops.append(batcher._worker.get_loop())
+        return result
+    
+    first = asyncio.run(run("first"))
+    second = asyncio.run(run("second!"))
+    
+    assert float(first[0]) == 5.0
+    assert float(second[0]) == 7.0
+    assert loops[0] is not loops[1]
+    assert encoder.batches == [["first"], ["second!"]]
@@ -0,0 +1,95 @@
+"""Unit tests for the LLM answer cache."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services.llm_service import LLMService
+
+
+class StubCompletions:
+    """Stands in for client.chat.completions, counting API calls."""
+    
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("upstream error")
+        question = kwargs["messages"][-1]["content"]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f" answer {self.calls}: {question} "))]
+        )
+
+
+def create_service(completions: StubCompletions) -> LLMService:
+    """Create an LLM service whose OpenAI client is replaced by a stub."""
+    service = LLMService(api_key="test-key")
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service
+
+
+def ask(service: LLMService, question: str, context: list, product_id: str = "iphone-15") -> str:
+    """Run generate_answer synchronously."""
+    return asyncio.run(service.generate_answer(question, context, cache_key_extra=product_id))
+
+
+def test_answer_cache_hit_skips_call():
+    """Test a repeated question is answered from the cache."""
+    completions = StubCompletions()
+    service = create_service(completions)
+    
+    first = ask(service, "What is the battery?", ["4000 mAh"])
+    second = ask(service, "what is the battery?  ", ["4000 mAh"])
+    
+    assert first == second
+    assert completions.calls == 1
+
+
+def test_answer_cache_misses_on_different_inputs():
+    """Test product, question and context are all part of the cache key."""
+    completions = StubCompletions()
+    service = create_service(completions)
+    
+    ask(service, "What is the battery?", ["4000 mAh"])
+    ask(service, "What is the battery?", ["4000 mAh"], product_id="iphone-15-pro")
+    ask(service, "What is the screen?", ["4000 mAh"])
+    ask(service, "What is the battery?", ["4400 mAh"])
+    
+    assert completions.calls == 4
+
+
+def test_answer_cache_evicts_least_recently_used(monkeypatch):
+    """Test the cache holds at most answer_cache_size answers."""
+    monkeypatch.setattr(settings, "answer_cache_size", 2)
+    completions = StubCompletions()
+    service = create_service(completions)
+    
+    ask(service, "q1", ["ctx"])
+    ask(service, "q2", ["ctx"])
+    ask(service, "q1", ["ctx"])  # refresh q1 so q2 is the oldest
+    ask(service, "q3", ["ctx"])  # evicts q2
+    assert completions.calls == 3
+    assert len(service._answer_cache) == 2
+    
+    ask(service, "q1", ["ctx"])
+    assert completions.calls == 3
+    ask(service, "q2", ["ctx"])
+    assert completions.calls == 4
+
+
+def test_answer_cache_skips_errors():
+    """Test failed generations are not cached."""
+    completions = StubCompletions(fail=True)
+    service = create_service(completions)
+    
+    for _ in range(2):
+        with pytest.raises(Exception, match="Failed to generate answer"):
+            ask(service, "What is the battery?", ["4000 mAh"])
+    
+    assert completions.calls == 2
+    assert len(service._answer_cache) == 0
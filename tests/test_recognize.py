@@ -1,10 +1,13 @@
 """Unit tests for product recognition endpoint."""
 
+import functools
+
 import pytest
 from fastapi.testclient import TestClient
 from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
 
+from app.config import settings
 from app.main import app
 from app.services.ocr_service import OCRService
 from app.services.matcher_service import MatcherService
@@ -12,8 +15,45 @@ from app.services.matcher_service import MatcherService
 client = TestClient(app)
 
 
+class StubMatcherService:
+    """Matcher stand-in that knows every product and matches nothing."""
+    
+    def validate_product_id(self, product_id: str) -> bool:
+        return True
+    
+    def find_matches(self, ocr_text: str, top_k: int = None) -> list:
+        return []
+
+
+class StubOCRService:
+    """OCR stand-in that returns fixed text."""
+    
+    def __init__(self, text: str):
+        self.text = text
+    
+    def extract_text(self, image_bytes: bytes) -> str:
+        return self.text
+
+
+class StubRAGService:
+    """RAG stand-in whose query embedding always fails."""
+    
+    async def embed_query(self, query: str):
+        raise RuntimeError("encoder unavailable")
+    
+    def retrieve_with_embedding(self, query_embedding, product_id: str = None, top_k: int = None) -> list:
+        return []
+
+
+def install_stub_services(monkeypatch, **services):
+    """Expose stub services on app.state (the module-level client skips startup)."""
+    for name, service in services.items():
+        monkeypatch.setattr(app.state, name, service, raising=False)
+
+
+@functools.lru_cache(maxsize=None)
 def create_test_image(text: str) -> bytes:
-    """Create a simple test image with text."""
+    """Create a simple test image with text (cached per text)."""
     # Create a white image
     img = Image.new('RGB', (400, 200), color='white')
     draw = ImageDraw.Draw(img)
@@ -21,9 +61,9 @@ def create_test_image(text: str) -> bytes:
     # Draw text (use default font)
     draw.text((50, 80), text, fill='black')
     
-    # Convert to bytes
+    # Convert to bytes (fast zlib level; images are never stored)
     img_bytes = BytesIO()
-    img.save(img_bytes, format='PNG')
+    img.save(img_bytes, format='PNG', compress_level=1)
     img_bytes.seek(0)
     
     return img_bytes.getvalue()
@@ -70,6 +110,40 @@ def test_matcher_service():
     assert candidates[0].score >= 0.0
 
 
+def test_matcher_cache():
+    """Test that repeated OCR text is served from the match cache."""
+    matcher = MatcherService(cache_size=1)
+    
+    first = matcher.find_matches("MacBook Pro", top_k=3)
+    second = matcher.find_matches("  macbook pro ", top_k=3)
+    
+    # Normalized text hits the cache and returns the same candidates
+    assert second == first
+    assert second is not first
+    assert len(matcher._match_cache) == 1
+    
+    # Oldest entry is evicted once the cache is full
+    matcher.find_matches("AirPods Max", top_k=3)
+    assert len(matcher._match_cache) == 1
+    
+    matcher.clear_cache()
+    assert len(matcher._match_cache) == 0
+
+
+def test_matcher_cache_keeps_request_ocr_text(monkeypatch):
+    """Test fallback OCR evidence comes from the request, not the cached entry."""
+    monkeypatch.setattr(settings, "min_confidence", 0.0)
+    matcher = MatcherService(cache_size=4)
+    
+    first = matcher.find_matches("qqq 15!", top_k=3)
+    second = matcher.find_matches("QQQ 15", top_k=3)
+    
+    assert len(matcher._match_cache) == 1
+    assert [c.product_id for c in second] == [c.product_id for c in first]
+    assert first and all(c.evidence == ["OCR: qqq 15!"] for c in first)
+    assert all(c.evidence == ["OCR: QQQ 15"] for c in second)
+
+
 def test_recognize_endpoint():
     """Test recognition endpoint with image upload."""
     # Create test image
@@ -96,6 +170,18 @@ def test_recognize_invalid_file():
     assert response.status_code == 400
 
 
+def test_recognize_image_too_large(monkeypatch):
+    """Test recognition endpoint rejects oversized uploads."""
+    monkeypatch.setattr(settings, "max_image_bytes", 1024)
+    
+    files = {"image": ("big.png", b"\x00" * 2048, "image/png")}
+    response = client.post("/recognize", files=files)
+    
+    # Should return 413 before running OCR
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Image too large. Maximum size is 1024 bytes."
+
+
 def test_answer_endpoint_invalid_product():
     """Test answer endpoint with invalid product ID."""
     response = client.post(
@@ -119,6 +205,27 @@ def test_answer_endpoint_valid_product():
     assert response.status_code in [200, 500]
 
 
+def test_answer_endpoint_embedding_failure(monkeypatch):
+    """Test answer endpoint degrades when the question cannot be embedded."""
+    install_stub_services(
+        monkeypatch,
+        matcher_service=StubMatcherService(),
+        rag_service=StubRAGService(),
+        llm_service=None
+    )
+    
+    response = client.post(
+        "/products/iphone-15-pro-max/answer",
+        json={"question": "What is the battery capacity?"}
+    )
+    
+    assert response.status_code == 200
+    assert response.json() == {
+        "answer": "No relevant information found in the product documentation.",
+        "context_sources": []
+    }
+
+
 def test_combined_endpoint():
     """Test combined endpoint."""
     # Create test image
@@ -139,6 +246,46 @@ def test_combined_endpoint():
         assert "answer" in result
 
 
+def test_combined_endpoint_no_text(monkeypatch):
+    """Test combined response shape when no text is extracted."""
+    install_stub_services(
+        monkeypatch,
+        ocr_service=StubOCRService(""),
+        matcher_service=StubMatcherService(),
+        rag_service=None,
+        llm_service=None
+    )
+    files = {"image": ("test.png", create_test_image(""), "image/png")}
+    
+    response = client.post("/recognize-and-answer", files=files)
+    
+    assert response.status_code == 200
+    assert response.json() == {"recognition": {"candidates": [], "best_product_id": None}}
+
+
+def test_combined_endpoint_no_match(monkeypatch):
+    """Test combined response shape when the text matches no product."""
+    install_stub_services(
+        monkeypatch,
+        ocr_service=StubOCRService("Unknown Gadget"),
+        matcher_service=StubMatcherService(),
+        rag_service=StubRAGService(),
+        llm_service=None
+    )
+    files = {"image": ("test.png", create_test_image("Unknown Gadget"), "image/png")}
+    data = {"question": "What chip does this have?"}
+    
+    response = client.post("/recognize-and-answer", files=files, data=data)
+    
+    assert response.status_code == 200
+    assert response.json() == {
+        "recognition": {"candidates": [], "best_product_id": None},
+        "answer": {
+            "answer": "Cannot answer question: product not recognized from image.",
+            "context_sources": []
+        }
+    }
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
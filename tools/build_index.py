@@ -6,6 +6,11 @@ from pathlib import Path
 # Add parent directory to path to import app modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.utils.concurrency import configure_native_threads, set_native_thread_env
+
+# Must precede the service imports, which load numpy, torch and faiss
+set_native_thread_env()
+
 from app.services.rag_service import RAGService
 import logging
 
@@ -22,6 +27,8 @@ def main():
     logger.info("Starting FAISS index build process...")
     
     try:
+        configure_native_threads()
+        
         # Initialize RAG service (will build index if not exists)
         rag_service = RAGService()
         
@@ -33,7 +40,7 @@ def main():
         return 0
         
     except Exception as e:
-        logger.error(f"Index build failed: {e}")
+        logger.error("Index build failed: %s", e)
         return 1
 
 
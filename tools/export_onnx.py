@@ -0,0 +1,61 @@
+"""Standalone script to export the embedding model to quantized ONNX."""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Instruction sets supported by sentence-transformers' dynamic quantization
+QUANTIZATION_CONFIGS = ('arm64', 'avx2', 'avx512', 'avx512_vnni')
+
+
+def main():
+    """Export the embedding model to ONNX and quantize it to INT8."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--quantization',
+        choices=QUANTIZATION_CONFIGS,
+        default='avx512_vnni',
+        help="Target instruction set for INT8 dynamic quantization"
+    )
+    args = parser.parse_args()
+    
+    try:
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+        
+        output_dir = str(settings.onnx_model_dir)
+        logger.info("Exporting %s to ONNX...", settings.embedding_model)
+        
+        # backend="onnx" converts the torch weights to onnx/model.onnx
+        model = SentenceTransformer(settings.embedding_model, backend="onnx")
+        model.save(output_dir)
+        
+        logger.info("Quantizing for %s...", args.quantization)
+        export_dynamic_quantized_onnx_model(model, args.quantization, output_dir)
+        
+        logger.info(
+            "Export completed! Set EMBEDDING_BACKEND=onnx and "
+            "ONNX_MODEL_FILE=onnx/model_qint8_%s.onnx to use it",
+            args.quantization
+        )
+        return 0
+        
+    except Exception as e:
+        logger.error("ONNX export failed: %s", e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())